@@ -1,15 +1,19 @@
 import requests
-from bs4 import BeautifulSoup
+import requests.adapters
+from lxml import etree, html as LH
 import re
 import json
+import csv
+import operator
 import time
 import os
 import sys
 import argparse
 import concurrent.futures
+from collections import Counter
 from datetime import datetime, timedelta
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from typing import List, Dict, Optional, Union
 import logging
 from urllib.parse import urljoin
@@ -23,14 +27,98 @@ except ImportError:
     HAS_TQDM = False
     print("建議安裝 tqdm 來顯示進度條: pip install tqdm")
 
-# pandas for CSV export
+# orjson for faster JSON output
 try:
-    import pandas as pd
-    HAS_PANDAS = True
+    import orjson
+    HAS_ORJSON = True
 except ImportError:
-    HAS_PANDAS = False
+    HAS_ORJSON = False
 
-@dataclass
+# 看板最新頁數快取秒數
+LATEST_PAGE_TTL = 60
+
+# CSV 導出欄位
+CSV_FIELDS = [
+    'board', 'article_id', 'title', 'author', 'date', 'content', 'ip',
+    'push_count', 'boo_count', 'neutral_count', 'total_messages', 'url', 'crawl_time'
+]
+
+# 內文中以這些字元開頭的系統訊息行會被略過 (另外略過 '--' 簽名檔分隔線)
+_SKIP_FIRST = frozenset('※◆')
+
+# 預編譯正則表達式 (發信站 IP 位置不固定，仍以正則搜尋)
+_IP_RE = re.compile(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b')
+
+# 看板頁數連結 (不綁定看板名稱，由呼叫端比對擷取到的看板)
+_PREV_PAGE_RE = re.compile(rb'href="/bbs/([^"/]+)/index(\d+)\.html">&lsaquo;')
+_INDEX_LINK_RE = re.compile(rb'/bbs/([^"/]+)/index(\d+)\.html')
+
+def _is_ipv4(token: str) -> bool:
+    """是否為 IPv4 位址 (推文 IP 固定在開頭，不需用正則搜尋)"""
+    parts = token.split('.')
+    return len(parts) == 4 and all(
+        part.isascii() and part.isdigit() and len(part) <= 3 for part in parts
+    )
+
+def _raw_keyword(keyword: str) -> Optional[bytes]:
+    """
+    關鍵字在原始 HTML 中的小寫 bytes，用於解析前的快速篩選。
+    含 HTML 跳脫字元或非 ASCII 大小寫字母的關鍵字無法直接比對 bytes，回傳 None
+    """
+    if any(c in '&<>"\'' for c in keyword):
+        return None
+    if any(not c.isascii() and c.lower() != c.upper() for c in keyword):
+        return None
+    return keyword.lower().encode('utf-8')
+
+def _article_post_time(article_id: str) -> Optional[int]:
+    """由文章 ID (M.<epoch>.A.xxx) 取得發文時間戳，格式不符時回傳 None"""
+    parts = article_id.split('.')
+    if len(parts) >= 2 and parts[0] == 'M' and parts[1].isdigit():
+        return int(parts[1])
+    return None
+
+def _has_class(name: str) -> str:
+    """XPath 條件: class 屬性中含有指定的 class 名稱"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# 預編譯 XPath (看板文章列表)
+_XP_ENTRIES = etree.XPath(f"//div[{_has_class('r-ent')}]")
+_XP_TITLE_LINK = etree.XPath(f"./div[{_has_class('title')}]/a[@href != '']")
+_XP_AUTHOR = etree.XPath(f"string(.//div[{_has_class('author')}])", smart_strings=False)
+_XP_DATE = etree.XPath(f"string(.//div[{_has_class('date')}])", smart_strings=False)
+_XP_NREC = etree.XPath(f"string(./div[{_has_class('nrec')}])", smart_strings=False)
+
+# 預編譯 XPath (文章頁面)
+_XP_MAIN = etree.XPath("//*[@id='main-content']")
+_XP_METALINES = etree.XPath(f".//div[{_has_class('article-metaline')}]")
+_XP_META_VALUE = etree.XPath(
+    f"string(.//span[{_has_class('article-meta-value')}])", smart_strings=False
+)
+
+# 推文: 只選出四個欄位齊全的推文 (排除「檔案過大」等提示框)
+_PUSH_FIELDS = ('push-tag', 'push-userid', 'push-content', 'push-ipdatetime')
+_XP_PUSHES = etree.XPath(
+    f".//div[{_has_class('push')}"
+    + ''.join(f" and ./span[{_has_class(name)}]" for name in _PUSH_FIELDS)
+    + "]"
+)
+_XP_PUSH_TAG, _XP_PUSH_USERID, _XP_PUSH_CONTENT, _XP_PUSH_IPDATETIME = (
+    etree.XPath(f"string(./span[{_has_class(name)}])", smart_strings=False)
+    for name in _PUSH_FIELDS
+)
+
+# 文章內文: 排除 metadata 與推文區塊內的文字，不需修改 DOM
+_XP_BODY_TEXT = etree.XPath(
+    ".//text()[not(ancestor::div["
+    f"{_has_class('article-metaline')} or "
+    f"{_has_class('article-metaline-right')} or "
+    f"{_has_class('push')}"
+    "])]",
+    smart_strings=False
+)
+
+@dataclass(slots=True)
 class Article:
     """文章數據結構"""
     board: str
@@ -45,14 +133,8 @@ class Article:
     boo_count: int = 0
     neutral_count: int = 0
     total_messages: int = 0
-    messages: List[Dict] = None
-    crawl_time: str = ""
-    
-    def __post_init__(self):
-        if self.messages is None:
-            self.messages = []
-        if not self.crawl_time:
-            self.crawl_time = datetime.now().isoformat()
+    messages: List[Dict] = field(default_factory=list)
+    crawl_time: str = field(default_factory=lambda: datetime.now().isoformat())
 
 @dataclass
 class CrawlConfig:
@@ -63,6 +145,7 @@ class CrawlConfig:
     max_retries: int = 3
     max_workers: int = 4
     output_dir: str = "./crawled_data"
+    article_cache_ttl: int = 7 * 24 * 3600  # 文章本地快取有效秒數 (只快取發文超過此秒數的文章)，0 表示停用
     user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     
     @classmethod
@@ -84,9 +167,17 @@ class PTTCrawler:
     
     def __init__(self, config: CrawlConfig = None):
         self.config = config or CrawlConfig()
+        self._pool_size = 0  # 目前連線池對應的 max_workers (見 _mount_adapter)
         self.session = self._create_session()
         self.logger = self._setup_logger()
         
+        # 最新頁數快取 {board_name: (取得時間, 頁數)}
+        self._latest_page_cache = {}
+        
+        # 長駐線程池，於首次使用時建立 (見 _get_executor)
+        self._executor = None
+        self._executor_workers = 0
+        
         # 確保輸出目錄存在
         Path(self.config.output_dir).mkdir(parents=True, exist_ok=True)
     
@@ -97,8 +188,50 @@ class PTTCrawler:
             'User-Agent': self.config.user_agent
         })
         session.cookies.update({'over18': '1'})  # 年齡驗證
+        self._mount_adapter(session)
         return session
     
+    def _mount_adapter(self, session: requests.Session):
+        """依 max_workers 設定連線池大小 (列表頁與文章皆由工作線程抓取，每線程一條連線)"""
+        old_adapters = {id(a): a for a in (session.adapters.get('https://'),
+                                           session.adapters.get('http://')) if a}
+        
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.config.max_workers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        self._pool_size = self.config.max_workers
+        
+        # 關閉舊的連線池，釋放其中保持連線的 socket
+        for old_adapter in old_adapters.values():
+            old_adapter.close()
+    
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """取得共用線程池，max_workers 變更時重建 (連線池一併調整)"""
+        if self._pool_size != self.config.max_workers:
+            self._mount_adapter(self.session)
+        
+        if self._executor is None or self._executor_workers != self.config.max_workers:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.config.max_workers
+            )
+            self._executor_workers = self.config.max_workers
+        return self._executor
+    
+    def close(self):
+        """關閉線程池與連線"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.session.close()
+    
+    def __enter__(self) -> 'PTTCrawler':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
     def _setup_logger(self) -> logging.Logger:
         """設置日誌"""
         logger = logging.getLogger('PTTCrawler')
@@ -132,7 +265,20 @@ class PTTCrawler:
                     return None
     
     def get_latest_page_number(self, board_name: str) -> int:
-        """獲取看板最新頁數"""
+        """獲取看板最新頁數 (結果快取 LATEST_PAGE_TTL 秒)"""
+        cached = self._latest_page_cache.get(board_name)
+        if cached and time.monotonic() - cached[0] < LATEST_PAGE_TTL:
+            return cached[1]
+        
+        latest_page = self._fetch_latest_page_number(board_name)
+        if latest_page > 0:
+            self._latest_page_cache[board_name] = (time.monotonic(), latest_page)
+        else:
+            self._latest_page_cache.pop(board_name, None)
+        return latest_page
+    
+    def _fetch_latest_page_number(self, board_name: str) -> int:
+        """從看板首頁解析最新頁數"""
         url = f"https://www.ptt.cc/bbs/{board_name}/index.html"
         response = self._make_request(url)
         
@@ -140,189 +286,232 @@ class PTTCrawler:
             return 0
         
         # 方法1: 查找上一頁連結
-        pattern = rf'href="/bbs/{board_name}/index(\d+)\.html">&lsaquo;'
-        match = re.search(pattern, response.text)
-        if match:
-            return int(match.group(1)) + 1
-        
-        # 方法2: 解析所有頁數連結
-        soup = BeautifulSoup(response.text, 'html.parser')
-        page_numbers = soup.find_all('a', href=re.compile(rf'/{board_name}/index(\d+)\.html'))
-        
-        if page_numbers:
-            pages = [int(p.get('href').split('index')[1].replace('.html', '')) 
-                    for p in page_numbers]
-            return max(pages)
-        
-        return 0
-    
-    def extract_articles_from_page(self, board_name: str, page_num: int) -> List[Dict]:
-        """從指定頁面提取文章基本信息"""
+        board = board_name.encode()
+        match = _PREV_PAGE_RE.search(response.content)
+        if match and match.group(1) == board:
+            return int(match.group(2)) + 1
+        
+        # 方法2: 直接在原始 HTML 中找出所有頁數連結，取最大值
+        return max((int(m.group(2)) for m in _INDEX_LINK_RE.finditer(response.content)
+                    if m.group(1) == board),
+                   default=0)
+    
+    def extract_articles_from_page(self, board_name: str, page_num: int,
+                                   as_articles: bool = False) -> List[Union[Dict, Article]]:
+        """從指定頁面提取文章基本信息 (as_articles=True 時直接回傳不含內文的 Article)"""
         url = f"https://www.ptt.cc/bbs/{board_name}/index{page_num}.html"
         response = self._make_request(url)
         
         if not response:
             return []
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return self._parse_index_page(board_name, response.content, as_articles)
+    
+    def _parse_index_page(self, board_name: str, html: bytes,
+                          as_articles: bool = False) -> List[Union[Dict, Article]]:
+        """解析看板列表頁 HTML"""
+        try:
+            root = LH.fromstring(html)
+        except etree.ParserError:
+            return []
+        
         articles = []
         
-        for div in soup.find_all("div", class_="r-ent"):
-            link_elem = div.find('a')
-            if not link_elem or not link_elem.get('href'):
+        for div in _XP_ENTRIES(root):
+            links = _XP_TITLE_LINK(div)
+            if not links:
                 continue
             
-            href = link_elem['href']
+            href = links[0].get('href')
             article_url = urljoin("https://www.ptt.cc", href)
             article_id = href.split('/')[-1].replace('.html', '')
-            title = link_elem.get_text(strip=True)
+            title = links[0].text_content().strip()
             
-            # 提取作者和日期
-            author_elem = div.find('div', class_='author')
-            date_elem = div.find('div', class_='date')
+            # 作者、日期以 string() 直接取文字
+            author = _XP_AUTHOR(div).strip()
+            date = _XP_DATE(div).strip()
             
-            # 提取推文數
-            push_elem = div.find('div', class_='nrec')
-            push_text = push_elem.get_text(strip=True) if push_elem else ''
+            if as_articles:
+                articles.append(Article(
+                    board=board_name,
+                    article_id=article_id,
+                    title=title,
+                    author=author,
+                    date=date,
+                    content="",
+                    url=article_url
+                ))
+                continue
             
             articles.append({
                 'board': board_name,
                 'article_id': article_id,
                 'title': title,
-                'author': author_elem.get_text(strip=True) if author_elem else '',
-                'date': date_elem.get_text(strip=True) if date_elem else '',
+                'author': author,
+                'date': date,
                 'url': article_url,
-                'push_preview': push_text
+                'push_preview': _XP_NREC(div).strip()
             })
         
         return articles
     
-    def parse_article_content(self, article_url: str) -> Optional[Dict]:
-        """解析單篇文章詳細內容"""
+    def parse_article_content(self, basic_info: Dict) -> Optional[Article]:
+        """解析單篇文章詳細內容 (basic_info 至少需含 board、article_id、url)"""
+        article_url = basic_info['url']
         response = self._make_request(article_url)
         if not response:
             return None
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        main_content = soup.find(id="main-content")
+        try:
+            mains = _XP_MAIN(LH.fromstring(response.content))
+        except etree.ParserError:
+            mains = []
         
-        if not main_content:
+        if not mains:
             self.logger.warning(f"找不到文章內容: {article_url}")
             return None
+        main_content = mains[0]
         
         # 解析 metadata
-        metas = main_content.select('div.article-metaline')
+        metas = _XP_METALINES(main_content)
         author = title = date = ''
         
         if len(metas) >= 3:
-            try:
-                author = metas[0].select('span.article-meta-value')[0].get_text(strip=True)
-                title = metas[1].select('span.article-meta-value')[0].get_text(strip=True)
-                date = metas[2].select('span.article-meta-value')[0].get_text(strip=True)
-            except (IndexError, AttributeError):
-                pass
-        
-        # 移除 metadata
-        for meta in metas:
-            meta.extract()
-        for meta in main_content.select('div.article-metaline-right'):
-            meta.extract()
+            author = _XP_META_VALUE(metas[0]).strip()
+            title = _XP_META_VALUE(metas[1]).strip()
+            date = _XP_META_VALUE(metas[2]).strip()
         
         # 解析推文
-        pushes = main_content.find_all('div', class_='push')
         messages = []
-        push_count = boo_count = neutral_count = 0
+        tags = []
         
-        for push in pushes:
-            push.extract()
+        for push in _XP_PUSHES(main_content):
+            tag = _XP_PUSH_TAG(push).strip()
+            userid = _XP_PUSH_USERID(push).strip()
+            content = _XP_PUSH_CONTENT(push).strip()
+            datetime_str = _XP_PUSH_IPDATETIME(push).strip()
             
-            try:
-                tag_elem = push.find('span', 'push-tag')
-                userid_elem = push.find('span', 'push-userid')
-                content_elem = push.find('span', 'push-content')
-                datetime_elem = push.find('span', 'push-ipdatetime')
-                
-                if all([tag_elem, userid_elem, content_elem, datetime_elem]):
-                    tag = tag_elem.get_text(strip=True)
-                    userid = userid_elem.get_text(strip=True)
-                    content = content_elem.get_text(strip=True)
-                    datetime_str = datetime_elem.get_text(strip=True)
-                    
-                    if content.startswith(':'):
-                        content = content[1:].strip()
-                    
-                    # 解析 IP 和時間
-                    ip_pattern = r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b'
-                    ip_match = re.search(ip_pattern, datetime_str)
-                    
-                    if ip_match:
-                        ip = ip_match.group()
-                        datetime_clean = datetime_str.replace(ip, '').strip()
-                    else:
-                        ip = "Unknown"
-                        datetime_clean = datetime_str
-                    
-                    messages.append({
-                        'push_tag': tag,
-                        'push_userid': userid,
-                        'push_content': content,
-                        'push_ip': ip,
-                        'push_datetime': datetime_clean
-                    })
-                    
-                    # 統計推文類型
-                    if tag == '推':
-                        push_count += 1
-                    elif tag == '噓':
-                        boo_count += 1
-                    else:
-                        neutral_count += 1
-            except Exception:
-                continue
-        
-        # 提取文章內容
-        content_strings = []
-        for string in main_content.stripped_strings:
-            if (string.startswith('※') or 
-                string.startswith('◆') or 
-                string.startswith('--')):
-                continue
-            content_strings.append(string.strip())
+            if content.startswith(':'):
+                content = content[1:].strip()
+            
+            # 解析 IP 和時間 (格式為 "[IP] MM/DD HH:MM"，IP 若存在必為第一段)
+            first, _, rest = datetime_str.partition(' ')
+            
+            if _is_ipv4(first):
+                ip = first
+                datetime_clean = rest.strip()
+            else:
+                ip = "Unknown"
+                datetime_clean = datetime_str
+            
+            messages.append({
+                'push_tag': tag,
+                'push_userid': userid,
+                'push_content': content,
+                'push_ip': ip,
+                'push_datetime': datetime_clean
+            })
+            tags.append(tag)
         
-        content = ' '.join(content_strings)
-        content = re.sub(r'\s+', ' ', content).strip()
+        # 統計推文類型
+        tag_counts = Counter(tags)
+        push_count = tag_counts['推']
+        boo_count = tag_counts['噓']
+        neutral_count = len(tags) - push_count - boo_count
         
-        # 提取發文者 IP
+        # 提取文章內容 (split 同時完成去頭尾空白與空白壓縮)，順便找出發文者 IP
+        content_words = []
         ip = "Unknown"
+        for string in _XP_BODY_TEXT(main_content):
+            if ip == "Unknown" and '※ 發信站:' in string:
+                ip_match = _IP_RE.search(string)
+                if ip_match:
+                    ip = ip_match.group()
+            
+            words = string.split()
+            if not words:
+                continue
+            if words[0][0] in _SKIP_FIRST or words[0].startswith('--'):
+                continue
+            content_words.extend(words)
+        
+        content = ' '.join(content_words)
+        
+        # 文章頁缺少 metadata 時沿用列表頁的資訊
+        return Article(
+            board=basic_info['board'],
+            article_id=basic_info['article_id'],
+            title=title or basic_info.get('title', ''),
+            author=author or basic_info.get('author', ''),
+            date=date or basic_info.get('date', ''),
+            content=content,
+            url=article_url,
+            ip=ip,
+            push_count=push_count,
+            boo_count=boo_count,
+            neutral_count=neutral_count,
+            total_messages=len(tags),
+            messages=messages
+        )
+    
+    def _article_cache_path(self, board_name: str, article_id: str) -> Path:
+        """文章快取檔路徑"""
+        return Path(self.config.output_dir) / '.cache' / board_name / f"{article_id}.json"
+    
+    def _is_cacheable(self, article_id: str) -> bool:
+        """發文時間已超過 article_cache_ttl 的文章才快取，近期文章推文數仍會變動"""
+        ttl = self.config.article_cache_ttl
+        if ttl <= 0:
+            return False
+        post_time = _article_post_time(article_id)
+        return post_time is not None and time.time() - post_time > ttl
+    
+    def _load_cached_article(self, board_name: str, article_id: str) -> Optional[Article]:
+        """讀取未過期的文章快取 (article_cache_ttl 為 0 時停用)"""
+        ttl = self.config.article_cache_ttl
+        if not self._is_cacheable(article_id):
+            return None
+        
+        cache_path = self._article_cache_path(board_name, article_id)
         try:
-            for string in main_content.strings:
-                if '※ 發信站:' in string:
-                    ip_match = re.search(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b', string)
-                    if ip_match:
-                        ip = ip_match.group()
-                        break
-        except:
-            pass
-        
-        return {
-            'title': title,
-            'author': author,
-            'date': date,
-            'content': content,
-            'ip': ip,
-            'push_count': push_count,
-            'boo_count': boo_count,
-            'neutral_count': neutral_count,
-            'total_messages': push_count + boo_count + neutral_count,
-            'messages': messages
-        }
+            if time.time() - cache_path.stat().st_mtime > ttl:
+                return None
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return Article(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
     
-    def crawl_single_article(self, board_name: str, article_id: str) -> Optional[Article]:
-        """爬取單篇文章"""
+    def _save_cached_article(self, article: Article):
+        """寫入文章快取 (先寫暫存檔再替換，避免讀到寫一半的檔案)"""
+        article_id = article.article_id
+        cache_path = self._article_cache_path(article.board, article_id)
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(asdict(article), f, ensure_ascii=False)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            self.logger.warning(f"寫入快取失敗 ({article_id}): {e}")
+    
+    def _parse_article_cached(self, basic_info: Dict, refresh: bool = False) -> Optional[Article]:
+        """先查本地快取，未命中才抓取文章並寫入快取 (refresh 時略過讀取，仍會更新快取)"""
+        if not refresh:
+            article = self._load_cached_article(basic_info['board'], basic_info['article_id'])
+            if article is not None:
+                return article
+        
+        article = self.parse_article_content(basic_info)
+        if article and self._is_cacheable(article.article_id):
+            self._save_cached_article(article)
+        return article
+    
+    def crawl_single_article(self, board_name: str, article_id: str,
+                             refresh: bool = True) -> Optional[Article]:
+        """爬取單篇文章 (預設重新抓取，不使用本地快取)"""
         if article_id.endswith('.html'):
-            url = f"https://www.ptt.cc/bbs/{board_name}/{article_id}"
-        else:
-            url = f"https://www.ptt.cc/bbs/{board_name}/{article_id}.html"
+            article_id = article_id[:-len('.html')]
+        url = f"https://www.ptt.cc/bbs/{board_name}/{article_id}.html"
         
         self.logger.info(f"正在爬取文章: {url}")
         
@@ -333,71 +522,93 @@ class PTTCrawler:
             'url': url
         }
         
-        # 獲取詳細內容
-        detailed_content = self.parse_article_content(url)
-        
-        if detailed_content:
-            # 合併信息創建 Article 對象
-            article_data = {**basic_info, **detailed_content}
-            article = Article(**article_data)
-            return article
-        
-        return None
+        # 獲取詳細內容 (refresh=False 時才使用本地快取)
+        return self._parse_article_cached(basic_info, refresh=refresh)
     
     def crawl_pages_range(self, board_name: str, start_page: int, end_page: int, 
                          include_content: bool = True) -> List[Article]:
         """爬取頁面範圍"""
         self.logger.info(f"開始爬取 {board_name} 看板，頁面 {start_page} 到 {end_page}")
         
-        all_articles = []
-        total_pages = end_page - start_page + 1
-        
-        # 使用進度條
-        page_iterator = range(start_page, end_page + 1)
-        if HAS_TQDM:
-            page_iterator = tqdm(page_iterator, desc="爬取頁面")
+        executor = self._get_executor()
+        page_futures = []
+        pending_pages = set()
+        article_slots = {}
+        
+        def dispatch_articles(done):
+            # 列表頁一完成就送出該頁的文章任務，不必等其他列表頁
+            for future in done:
+                pending_pages.discard(future)
+                if include_content:
+                    article_slots[future] = [
+                        (basic_info, executor.submit(self._parse_article_cached, basic_info))
+                        for basic_info in future.result()
+                    ]
         
-        for page in page_iterator:
+        try:
+            # 依 delay_between_pages 錯開送出列表頁，等待期間先處理已完成的頁面
+            page_iterator = range(start_page, end_page + 1)
             if HAS_TQDM:
-                page_iterator.set_description(f"爬取第 {page} 頁")
-            else:
-                self.logger.info(f"正在爬取第 {page} 頁...")
+                page_iterator = tqdm(page_iterator, desc="爬取頁面")
             
-            articles_basic = self.extract_articles_from_page(board_name, page)
+            for page in page_iterator:
+                if page_futures:
+                    deadline = time.monotonic() + self.config.delay_between_pages
+                    while True:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        if not pending_pages:
+                            time.sleep(remaining)
+                            break
+                        done, _ = concurrent.futures.wait(
+                            pending_pages, timeout=remaining,
+                            return_when=concurrent.futures.FIRST_COMPLETED
+                        )
+                        dispatch_articles(done)
+                if not HAS_TQDM:
+                    self.logger.info(f"正在爬取第 {page} 頁...")
+                future = executor.submit(self.extract_articles_from_page, board_name, page,
+                                         not include_content)
+                page_futures.append((page, future))
+                pending_pages.add(future)
             
-            if include_content:
-                # 並發爬取文章內容
-                with concurrent.futures.ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
-                    future_to_article = {
-                        executor.submit(self.parse_article_content, article['url']): article
-                        for article in articles_basic
-                    }
-                    
-                    for future in concurrent.futures.as_completed(future_to_article):
-                        basic_info = future_to_article[future]
-                        try:
-                            detailed_content = future.result()
-                            if detailed_content:
-                                article_data = {**basic_info, **detailed_content}
-                                article = Article(**article_data)
-                                all_articles.append(article)
-                        except Exception as exc:
-                            self.logger.error(f"文章 {basic_info['url']} 爬取失敗: {exc}")
-            else:
-                # 只獲取基本信息
-                for basic_info in articles_basic:
-                    article = Article(
-                        board=basic_info['board'],
-                        article_id=basic_info['article_id'],
-                        title=basic_info['title'],
-                        author=basic_info['author'],
-                        date=basic_info['date'],
-                        url=basic_info['url'],
-                        content=""
-                    )
-                    all_articles.append(article)
+            for future in concurrent.futures.as_completed(list(pending_pages)):
+                dispatch_articles([future])
+            
+            if not include_content:
+                # 不含內文時列表頁結果已是 Article，依頁面順序展開
+                articles_basic = []
+                for page, future in page_futures:
+                    articles_basic.extend(future.result())
+                self.logger.info(f"爬取完成！共獲得 {len(articles_basic)} 篇文章")
+                return articles_basic
+            
+            # 依頁面順序收集文章結果
+            article_futures = []
+            for page, future in page_futures:
+                article_futures.extend(article_slots[future])
             
-            time.sleep(self.config.delay_between_pages)
+            all_articles = []
+            article_iterator = article_futures
+            if HAS_TQDM:
+                article_iterator = tqdm(article_iterator, desc="爬取文章")
+            
+            for basic_info, future in article_iterator:
+                try:
+                    article = future.result()
+                    if article:
+                        all_articles.append(article)
+                except Exception as exc:
+                    self.logger.error(f"文章 {basic_info['url']} 爬取失敗: {exc}")
+        except BaseException:
+            # 中斷或出錯時取消尚未執行的工作，避免共用線程池在背景繼續抓取
+            for _, future in page_futures:
+                future.cancel()
+            for slots in article_slots.values():
+                for _, future in slots:
+                    future.cancel()
+            raise
         
         self.logger.info(f"爬取完成！共獲得 {len(all_articles)} 篇文章")
         return all_articles
@@ -410,16 +621,27 @@ class PTTCrawler:
         start_page = max(1, latest_page - max_pages + 1)
         
         found_articles = []
+        needle = _raw_keyword(keyword)
         
         for page in range(start_page, latest_page + 1):
-            articles = self.extract_articles_from_page(board_name, page)
+            if page > start_page:
+                time.sleep(self.config.delay_between_requests)
+            
+            url = f"https://www.ptt.cc/bbs/{board_name}/index{page}.html"
+            response = self._make_request(url)
+            if not response:
+                continue
+            
+            # 原始 HTML 中完全沒有關鍵字的頁面不必解析
+            if needle is not None and needle not in response.content.lower():
+                continue
+            
+            articles = self._parse_index_page(board_name, response.content)
             
             for article in articles:
                 if keyword.lower() in article['title'].lower():
                     found_articles.append(article)
                     self.logger.info(f"找到: {article['title']}")
-            
-            time.sleep(self.config.delay_between_requests)
         
         self.logger.info(f"搜尋完成，共找到 {len(found_articles)} 篇相關文章")
         return found_articles
@@ -432,51 +654,39 @@ class PTTCrawler:
         
         filepath = Path(self.config.output_dir) / filename
         
+        # orjson 原生支援 dataclass，不需先以 asdict 深複製整份資料
         data = {
-            'articles': [asdict(article) for article in articles],
+            'articles': articles,
             'crawl_time': datetime.now().isoformat(),
             'total_articles': len(articles),
-            'config': asdict(self.config)
+            'config': self.config
         }
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        if HAS_ORJSON:
+            filepath.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            data['articles'] = [asdict(article) for article in articles]
+            data['config'] = asdict(self.config)
+            with open(filepath, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
         
         self.logger.info(f"文章已保存至: {filepath}")
         return str(filepath)
     
     def export_to_csv(self, articles: List[Article], filename: str = None) -> str:
         """導出為 CSV 格式"""
-        if not HAS_PANDAS:
-            raise ImportError("需要安裝 pandas: pip install pandas")
-        
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"articles_{timestamp}.csv"
         
         filepath = Path(self.config.output_dir) / filename
         
-        # 準備數據
-        csv_data = []
-        for article in articles:
-            csv_data.append({
-                'board': article.board,
-                'article_id': article.article_id,
-                'title': article.title,
-                'author': article.author,
-                'date': article.date,
-                'content': article.content,
-                'ip': article.ip,
-                'push_count': article.push_count,
-                'boo_count': article.boo_count,
-                'neutral_count': article.neutral_count,
-                'total_messages': article.total_messages,
-                'url': article.url,
-                'crawl_time': article.crawl_time
-            })
-        
-        df = pd.DataFrame(csv_data)
-        df.to_csv(filepath, index=False, encoding='utf-8-sig')
+        # attrgetter 直接取出一列的欄位 tuple，不必為每篇文章建立 dict
+        row_of = operator.attrgetter(*CSV_FIELDS)
+        with open(filepath, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIELDS)
+            writer.writerows(map(row_of, articles))
         
         self.logger.info(f"CSV 文件已保存至: {filepath}")
         return str(filepath)
@@ -484,9 +694,10 @@ class PTTCrawler:
 class PTTCrawlerCLI:
     """命令行界面"""
     
-    def __init__(self):
-        self.config = CrawlConfig()
-        self.crawler = PTTCrawler(self.config)
+    def __init__(self, crawler: PTTCrawler = None):
+        # 共用同一個 crawler (及其 session)，避免重新建立連線
+        self.crawler = crawler or PTTCrawler()
+        self.config = self.crawler.config
     
     def show_menu(self):
         """顯示主選單"""
@@ -637,10 +848,6 @@ class PTTCrawlerCLI:
     
     def _convert_json_to_csv(self):
         """轉換 JSON 到 CSV"""
-        if not HAS_PANDAS:
-            print("[錯誤] 需要安裝 pandas: pip install pandas")
-            return
-        
         json_file = input("請輸入 JSON 文件路徑: ").strip()
         
         if not os.path.exists(json_file):
@@ -667,6 +874,7 @@ class PTTCrawlerCLI:
         print(f"頁面間隔: {self.config.delay_between_pages} 秒")
         print(f"並發數: {self.config.max_workers}")
         print(f"重試次數: {self.config.max_retries}")
+        print(f"文章快取: {self.config.article_cache_ttl} 秒 (0 表示停用)")
         print(f"輸出目錄: {self.config.output_dir}")
         
         if input("\n是否修改設定? (y/n): ").lower() == 'y':
@@ -683,9 +891,12 @@ class PTTCrawlerCLI:
                     input(f"並發數 ({self.config.max_workers}): ") 
                     or self.config.max_workers
                 )
+                self.config.article_cache_ttl = int(
+                    input(f"文章快取秒數 ({self.config.article_cache_ttl}): ") 
+                    or self.config.article_cache_ttl
+                )
                 
-                # 重新創建 crawler
-                self.crawler = PTTCrawler(self.config)
+                # self.config 即 crawler.config，修改後立即生效，不需重建 session
                 print("[成功] 設定已更新")
                 
             except ValueError:
@@ -772,7 +983,7 @@ def main():
     
     else:
         # 交互模式
-        cli = PTTCrawlerCLI()
+        cli = PTTCrawlerCLI(crawler)
         cli.run()
 
 if __name__ == "__main__":